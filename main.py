@@ -1,116 +1,312 @@
+from __future__ import annotations
+
 import os
 import sys
+import threading
 import time
-from typing import Optional
+from operator import itemgetter
+from typing import TYPE_CHECKING, Any, Callable, Optional
 
-import spotipy
-from spotipy.oauth2 import SpotifyOAuth
 from rich.console import Console
-from rich.table import Table
-from rich.progress import Progress
-from dotenv import load_dotenv
+from rich.panel import Panel
+from rich.text import Text
+
+# Heavy modules are imported where they are used to keep startup fast
+if TYPE_CHECKING:
+    import requests
+    import spotipy
 
-# Load environment variables
-load_dotenv()
+# Load environment variables from .env unless they are already set
+if not (os.getenv('SPOTIPY_CLIENT_ID') and os.getenv('SPOTIPY_CLIENT_SECRET')):
+    from dotenv import load_dotenv
+    load_dotenv()
 
 # Spotify API Configuration
-SPOTIFY_CLIENT_ID = os.getenv('SPOTIPY_CLIENT_ID')
-SPOTIFY_CLIENT_SECRET = os.getenv('SPOTIPY_CLIENT_SECRET')
-SPOTIFY_REDIRECT_URI = os.getenv('SPOTIPY_REDIRECT_URI', 'http://127.0.0.1:8888/callback')
+SPOTIFY_DEFAULT_REDIRECT_URI = 'http://127.0.0.1:8888/callback'
 SPOTIFY_SCOPE = "user-read-playback-state,user-modify-playback-state,user-read-currently-playing,playlist-read-private"
+SPOTIFY_CACHE_PATH = os.path.expanduser('~/.spotcli_cache')
+SPOTIFY_REQUESTS_TIMEOUT = 10
 
 # Initialize Rich console
 console = Console()
 
-def setup_spotify() -> Optional[spotipy.Spotify]:
+# Main menu, built once and reused on every redraw
+MENU_RENDERABLE = Panel.fit(
+    Text.from_markup(
+        "1. Play/Pause\n"
+        "2. Next Track\n"
+        "3. Previous Track\n"
+        "4. Search Track\n"
+        "5. My Playlists\n"
+        "6. Current Track Info\n"
+        "7. Adjust Volume\n"
+        "0. Exit"
+    ),
+    title="[bold green]Spotify CLI Player[/bold green]"
+)
+
+# Prompts shown repeatedly, parsed once
+PROMPT_MENU_CHOICE = Text.from_markup("[bold cyan]Choose an option: [/bold cyan]")
+PROMPT_SEARCH_QUERY = Text.from_markup("[bold cyan]Enter track name or artist: [/bold cyan]")
+PROMPT_CHOOSE_TRACK = Text.from_markup("[bold cyan]Choose a track to play (1-10) or 0 to go back: [/bold cyan]")
+PROMPT_RETURN_TO_MENU = Text.from_markup("\n[bold cyan]Press Enter to return to menu...[/bold cyan]")
+PROMPT_VOLUME = Text.from_markup("[bold cyan]Enter new volume (0-100): [/bold cyan]")
+
+# Shared HTTP session so API calls reuse pooled keep-alive connections
+http_session: Optional[requests.Session] = None
+
+def build_http_session() -> requests.Session:
+    """Create a pooled HTTP session with retries for the Spotify API."""
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util import Retry
+    
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=8,
+        max_retries=Retry(
+            total=3,
+            read=False,
+            status=3,
+            backoff_factor=0.2,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({'GET', 'POST', 'PUT', 'DELETE'}),
+            respect_retry_after_header=True
+        )
+    )
+    session.mount("https://", adapter)
+    return session
+
+# Short-lived cache of the current playback state
+PLAYBACK_TTL = 1.5
+_playback_cache = {'t': 0.0, 'v': None, 'gen': 0}
+_playback_lock = threading.Lock()
+
+def _store_playback(value: Optional[dict], generation: int) -> None:
+    """Cache a playback response unless it was invalidated while in flight."""
+    with _playback_lock:
+        if _playback_cache['gen'] == generation:
+            _playback_cache['v'] = value
+            _playback_cache['t'] = time.monotonic()
+
+def get_playback(sp: spotipy.Spotify) -> Optional[dict]:
+    """Return the current playback state, reusing a recent response if fresh."""
+    with _playback_lock:
+        if _playback_cache['t'] and time.monotonic() - _playback_cache['t'] < PLAYBACK_TTL:
+            return _playback_cache['v']
+        generation = _playback_cache['gen']
+    
+    value = sp.current_playback()
+    _store_playback(value, generation)
+    return value
+
+def invalidate_playback() -> None:
+    """Drop the cached playback state after a call that changes it."""
+    with _playback_lock:
+        _playback_cache['gen'] += 1
+        _playback_cache['t'] = 0.0
+        _playback_cache['v'] = None
+
+class LeakyBucket:
+    """Leaky-bucket limiter that spaces out requests to stay under the API rate limit."""
+    
+    def __init__(self, max_rate: float = 10.0, burst: int = 2) -> None:
+        self.max_rate = max_rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self) -> None:
+        """Block until a token is available, then consume it."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.max_rate)
+            self.updated = now
+            wait = (1 - self.tokens) / self.max_rate if self.tokens < 1 else 0.0
+            self.tokens -= 1
+        
+        if wait:
+            time.sleep(wait)
+
+rate_limiter = LeakyBucket()
+
+def control(method: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Call a playback-changing Spotify method under the rate limiter."""
+    rate_limiter.acquire()
+    try:
+        return method(*args, **kwargs)
+    finally:
+        invalidate_playback()
+
+class PlaybackPoller(threading.Thread):
+    """Keep the playback cache warm while the user is at the main menu."""
+    
+    INTERVAL = 1.0
+    IDLE_TIMEOUT = 30.0
+    
+    def __init__(self, sp: spotipy.Spotify) -> None:
+        super().__init__(name="playback-poller", daemon=True)
+        self.sp = sp
+        self.stop_event = threading.Event()
+        self.last_activity = time.monotonic()
+    
+    def touch(self) -> None:
+        """Record user activity, resuming polling if it had gone idle."""
+        self.last_activity = time.monotonic()
+    
+    def stop(self) -> None:
+        """Ask the polling loop to exit."""
+        self.stop_event.set()
+    
+    def run(self) -> None:
+        """Refresh the playback cache until stopped, pausing while idle."""
+        while not self.stop_event.wait(self.INTERVAL):
+            if time.monotonic() - self.last_activity > self.IDLE_TIMEOUT:
+                continue
+            with _playback_lock:
+                generation = _playback_cache['gen']
+            try:
+                # Never trigger an interactive login from this thread
+                auth_manager = self.sp.auth_manager
+                if auth_manager.validate_token(auth_manager.cache_handler.get_cached_token()) is None:
+                    continue
+                _store_playback(self.sp.current_playback(), generation)
+            except Exception:
+                # Errors surface on the next foreground call instead
+                pass
+
+def setup_spotify(
+    scope: str = SPOTIFY_SCOPE,
+    cache_path: str = SPOTIFY_CACHE_PATH,
+    requests_timeout: int = SPOTIFY_REQUESTS_TIMEOUT
+) -> Optional[spotipy.Spotify]:
     """Configure Spotify authentication."""
-    if not SPOTIFY_CLIENT_ID or not SPOTIFY_CLIENT_SECRET:
+    client_id = os.getenv('SPOTIPY_CLIENT_ID')
+    client_secret = os.getenv('SPOTIPY_CLIENT_SECRET')
+    redirect_uri = os.getenv('SPOTIPY_REDIRECT_URI', SPOTIFY_DEFAULT_REDIRECT_URI)
+    
+    if not client_id or not client_secret:
         console.print("[bold red]Error: Spotify credentials not configured![/bold red]")
         console.print("Please set the following environment variables:")
         console.print("  - SPOTIPY_CLIENT_ID")
         console.print("  - SPOTIPY_CLIENT_SECRET")
-        console.print("  - SPOTIPY_REDIRECT_URI (optional, default: http://127.0.0.1:8888/callback)")
+        console.print(f"  - SPOTIPY_REDIRECT_URI (optional, default: {SPOTIFY_DEFAULT_REDIRECT_URI})")
         sys.exit(1)
     
+    global http_session
+    import spotipy
+    from spotipy.cache_handler import CacheFileHandler
+    from spotipy.oauth2 import SpotifyOAuth
+    
     try:
-        sp = spotipy.Spotify(auth_manager=SpotifyOAuth(
-            client_id=SPOTIFY_CLIENT_ID,
-            client_secret=SPOTIFY_CLIENT_SECRET,
-            redirect_uri=SPOTIFY_REDIRECT_URI,
-            scope=SPOTIFY_SCOPE
-        ))
+        http_session = build_http_session()
+        sp = spotipy.Spotify(
+            auth_manager=SpotifyOAuth(
+                client_id=client_id,
+                client_secret=client_secret,
+                redirect_uri=redirect_uri,
+                scope=scope,
+                cache_handler=CacheFileHandler(cache_path=cache_path),
+                requests_session=http_session
+            ),
+            requests_session=http_session,
+            requests_timeout=requests_timeout
+        )
+        # Authenticate now so any login prompt runs before the menu and poller start
+        sp.auth_manager.get_access_token(as_dict=False)
         return sp
     except Exception as e:
         console.print(f"[bold red]Error authenticating with Spotify: {e}[/bold red]")
         sys.exit(1)
 
+def pause(seconds: float) -> None:
+    """Wait up to `seconds` so messages can be read, returning early on a keypress."""
+    if not sys.stdin.isatty():
+        return
+    
+    if os.name == 'nt':
+        import msvcrt
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            if msvcrt.kbhit():
+                msvcrt.getwch()
+                return
+            time.sleep(0.05)
+    else:
+        import select
+        ready, _, _ = select.select([sys.stdin], [], [], seconds)
+        if ready:
+            sys.stdin.readline()
+
+def parse_choice(value: str) -> int:
+    """Convert a numeric menu answer to an int, or -1 if it is not a number."""
+    if not value.isdecimal():
+        return -1
+    return int(value)
+
 def display_menu() -> str:
     """Display the main menu and get user input."""
-    console.clear()
-    console.print("[bold green]===== Spotify CLI Player =====[/bold green]")
-    console.print("1. Play/Pause")
-    console.print("2. Next Track")
-    console.print("3. Previous Track")
-    console.print("4. Search Track")
-    console.print("5. My Playlists")
-    console.print("6. Current Track Info")
-    console.print("7. Adjust Volume")
-    console.print("0. Exit")
-    return console.input("[bold cyan]Choose an option: [/bold cyan]")
+    if sys.stdout.isatty():
+        console.clear()
+    console.print(MENU_RENDERABLE)
+    return console.input(PROMPT_MENU_CHOICE)
 
 def toggle_playback(sp: spotipy.Spotify) -> None:
     """Toggle between play and pause."""
     try:
-        status = sp.current_playback()
+        status = get_playback(sp)
         if status and status['is_playing']:
-            sp.pause_playback()
+            control(sp.pause_playback)
             console.print("[yellow]Playback paused[/yellow]")
         else:
-            sp.start_playback()
+            control(sp.start_playback)
             console.print("[green]Playback started[/green]")
     except Exception as e:
         console.print(f"[bold red]Error: {e}[/bold red]")
     
-    time.sleep(1)
+    pause(1)
 
 def next_track(sp: spotipy.Spotify) -> None:
     """Skip to the next track."""
     try:
-        sp.next_track()
+        control(sp.next_track)
         console.print("[green]Skipped to next track[/green]")
     except Exception as e:
         console.print(f"[bold red]Error: {e}[/bold red]")
     
-    time.sleep(1)
+    pause(1)
 
 def previous_track(sp: spotipy.Spotify) -> None:
     """Go back to the previous track."""
     try:
-        sp.previous_track()
+        control(sp.previous_track)
         console.print("[green]Returned to previous track[/green]")
     except Exception as e:
         console.print(f"[bold red]Error: {e}[/bold red]")
     
-    time.sleep(1)
+    pause(1)
 
 def search_track(sp: spotipy.Spotify) -> None:
     """Search and play a track."""
-    query = console.input("[bold cyan]Enter track name or artist: [/bold cyan]")
+    from rich.table import Table
+    
+    query = console.input(PROMPT_SEARCH_QUERY)
     
     if not query:
         return
     
     try:
-        with Progress() as progress:
-            task = progress.add_task("[cyan]Searching...", total=1)
-            results = sp.search(q=query, limit=10)
-            progress.update(task, completed=1)
+        with console.status("[cyan]Searching..."):
+            # Passing a market drops the per-track available_markets list from the response
+            results = sp.search(q=query, limit=10, type='track', market='from_token')
         
         tracks = results['tracks']['items']
         
         if not tracks:
             console.print("[yellow]No tracks found.[/yellow]")
-            time.sleep(2)
+            pause(2)
             return
         
         table = Table(title=f"Results for '{query}'")
@@ -119,40 +315,74 @@ def search_track(sp: spotipy.Spotify) -> None:
         table.add_column("Artist", style="green")
         table.add_column("Album", style="yellow")
         
+        get_name = itemgetter('name')
         for i, track in enumerate(tracks, 1):
-            artists = ", ".join([artist['name'] for artist in track['artists']])
             table.add_row(
                 str(i),
                 track['name'],
-                artists,
+                ", ".join(map(get_name, track['artists'])),
                 track['album']['name']
             )
         
         console.print(table)
         
-        choice = console.input("[bold cyan]Choose a track to play (1-10) or 0 to go back: [/bold cyan]")
+        choice = console.input(PROMPT_CHOOSE_TRACK)
         
-        if choice.isdigit() and 1 <= int(choice) <= len(tracks):
-            track_uri = tracks[int(choice) - 1]['uri']
-            sp.start_playback(uris=[track_uri])
-            console.print(f"[green]Now playing: {tracks[int(choice) - 1]['name']}[/green]")
-            time.sleep(2)
+        index = parse_choice(choice)
+        if 1 <= index <= len(tracks):
+            track = tracks[index - 1]
+            control(sp.start_playback, uris=[track['uri']])
+            console.print(f"[green]Now playing: {track['name']}[/green]")
+            pause(2)
     
     except Exception as e:
         console.print(f"[bold red]Error: {e}[/bold red]")
-        time.sleep(2)
+        pause(2)
+
+PLAYLIST_PAGE_SIZE = 50
+PLAYLIST_FETCH_CONCURRENCY = 4
+
+async def _fetch_playlist_pages(sp: spotipy.Spotify, offsets: range) -> list:
+    """Fetch the remaining playlist pages concurrently."""
+    import asyncio
+    
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(PLAYLIST_FETCH_CONCURRENCY)
+    
+    async def fetch(offset: int) -> dict:
+        async with semaphore:
+            return await loop.run_in_executor(
+                None,
+                lambda: sp.current_user_playlists(limit=PLAYLIST_PAGE_SIZE, offset=offset)
+            )
+    
+    return await asyncio.gather(*(fetch(offset) for offset in offsets))
+
+def fetch_all_playlists(sp: spotipy.Spotify) -> list:
+    """Fetch every playlist of the current user."""
+    import asyncio
+    
+    first_page = sp.current_user_playlists(limit=PLAYLIST_PAGE_SIZE)
+    items = list(first_page['items'])
+    
+    offsets = range(PLAYLIST_PAGE_SIZE, first_page['total'], PLAYLIST_PAGE_SIZE)
+    if offsets:
+        for page in asyncio.run(_fetch_playlist_pages(sp, offsets)):
+            items.extend(page['items'])
+    
+    return items
 
 def list_playlists(sp: spotipy.Spotify) -> None:
     """List and play user's playlists."""
+    from rich.table import Table
+    
     try:
-        with Progress() as progress:
-            task = progress.add_task("[cyan]Loading playlists...", total=1)
-            playlists = sp.current_user_playlists()
-            progress.update(task, completed=1)
+        with console.status("[cyan]Loading playlists..."):
+            playlists = fetch_all_playlists(sp)
         
-        if not playlists['items']:
+        if not playlists:
             console.print("[yellow]No playlists found.[/yellow]")
-            time.sleep(2)
+            pause(2)
             return
         
         table = Table(title="Your Playlists")
@@ -160,7 +390,7 @@ def list_playlists(sp: spotipy.Spotify) -> None:
         table.add_column("Name", style="cyan")
         table.add_column("Tracks", style="green")
         
-        for i, playlist in enumerate(playlists['items'], 1):
+        for i, playlist in enumerate(playlists, 1):
             table.add_row(
                 str(i),
                 playlist['name'],
@@ -169,30 +399,31 @@ def list_playlists(sp: spotipy.Spotify) -> None:
         
         console.print(table)
         
-        choice = console.input("[bold cyan]Choose a playlist to play (1-10) or 0 to go back: [/bold cyan]")
+        choice = console.input(f"[bold cyan]Choose a playlist to play (1-{len(playlists)}) or 0 to go back: [/bold cyan]")
         
-        if choice.isdigit() and 1 <= int(choice) <= len(playlists['items']):
-            playlist_uri = playlists['items'][int(choice) - 1]['uri']
-            sp.start_playback(context_uri=playlist_uri)
-            console.print(f"[green]Now playing playlist: {playlists['items'][int(choice) - 1]['name']}[/green]")
-            time.sleep(2)
+        index = parse_choice(choice)
+        if 1 <= index <= len(playlists):
+            playlist = playlists[index - 1]
+            control(sp.start_playback, context_uri=playlist['uri'])
+            console.print(f"[green]Now playing playlist: {playlist['name']}[/green]")
+            pause(2)
     
     except Exception as e:
         console.print(f"[bold red]Error: {e}[/bold red]")
-        time.sleep(2)
+        pause(2)
 
 def show_current_track(sp: spotipy.Spotify) -> None:
     """Display information about the currently playing track."""
     try:
-        current = sp.current_playback()
+        current = get_playback(sp)
         
         if not current or not current.get('item'):
             console.print("[yellow]No track currently playing.[/yellow]")
-            time.sleep(2)
+            pause(2)
             return
         
         track = current['item']
-        artists = ", ".join([artist['name'] for artist in track['artists']])
+        artists = ", ".join(map(itemgetter('name'), track['artists']))
         
         console.print("[bold green]Now Playing:[/bold green]")
         console.print(f"[cyan]Track:[/cyan] {track['name']}")
@@ -200,15 +431,15 @@ def show_current_track(sp: spotipy.Spotify) -> None:
         console.print(f"[cyan]Album:[/cyan] {track['album']['name']}")
         
         # Calculate track progress
-        progress_ms = current['progress_ms']
-        duration_ms = track['duration_ms']
-        progress_percent = (progress_ms / duration_ms) * 100
+        progress_ms = current.get('progress_ms') or 0
+        duration_ms = track.get('duration_ms') or 0
+        progress_percent = (progress_ms / duration_ms) * 100 if duration_ms else 0.0
         
         # Format time in minutes:seconds
-        progress_sec = progress_ms // 1000
-        duration_sec = duration_ms // 1000
-        progress_str = f"{progress_sec // 60}:{progress_sec % 60:02d}"
-        duration_str = f"{duration_sec // 60}:{duration_sec % 60:02d}"
+        progress_min, progress_sec = divmod(progress_ms // 1000, 60)
+        duration_min, duration_sec = divmod(duration_ms // 1000, 60)
+        progress_str = f"{progress_min}:{progress_sec:02d}"
+        duration_str = f"{duration_min}:{duration_sec:02d}"
         
         console.print(f"[cyan]Progress:[/cyan] {progress_str}/{duration_str} ({progress_percent:.1f}%)")
         
@@ -226,73 +457,84 @@ def show_current_track(sp: spotipy.Spotify) -> None:
         elif repeat_state == 'context':
             console.print("[cyan]Repeat:[/cyan] [green]Playlist/Album[/green]")
         
-        console.input("\n[bold cyan]Press Enter to return to menu...[/bold cyan]")
+        console.input(PROMPT_RETURN_TO_MENU)
     
     except Exception as e:
         console.print(f"[bold red]Error: {e}[/bold red]")
-        time.sleep(2)
+        pause(2)
 
 def adjust_volume(sp: spotipy.Spotify) -> None:
     """Adjust the playback volume."""
     try:
-        current = sp.current_playback()
+        current = get_playback(sp)
         if not current:
             console.print("[yellow]No active device found.[/yellow]")
-            time.sleep(2)
+            pause(2)
             return
         
         current_volume = current['device']['volume_percent']
         console.print(f"[cyan]Current volume:[/cyan] {current_volume}%")
         
-        new_volume = console.input("[bold cyan]Enter new volume (0-100): [/bold cyan]")
+        new_volume = console.input(PROMPT_VOLUME)
         
-        if new_volume.isdigit() and 0 <= int(new_volume) <= 100:
-            sp.volume(int(new_volume))
-            console.print(f"[green]Volume adjusted to {new_volume}%[/green]")
+        volume = parse_choice(new_volume)
+        if 0 <= volume <= 100:
+            control(sp.volume, volume)
+            console.print(f"[green]Volume adjusted to {volume}%[/green]")
         else:
             console.print("[yellow]Invalid value. Volume must be between 0 and 100.[/yellow]")
         
-        time.sleep(1)
+        pause(1)
     
     except Exception as e:
         console.print(f"[bold red]Error: {e}[/bold red]")
-        time.sleep(2)
+        pause(2)
+
+# Menu options mapped to their handlers
+ACTIONS = {
+    '1': toggle_playback,
+    '2': next_track,
+    '3': previous_track,
+    '4': search_track,
+    '5': list_playlists,
+    '6': show_current_track,
+    '7': adjust_volume,
+}
 
 def main() -> None:
     """Main function of the player."""
     console.print("[bold green]Starting Spotify CLI Player...[/bold green]")
+    poller = None
     
     try:
         sp = setup_spotify()
+        poller = PlaybackPoller(sp)
+        poller.start()
         
         while True:
+            poller.touch()
             option = display_menu()
             
-            if option == '1':
-                toggle_playback(sp)
-            elif option == '2':
-                next_track(sp)
-            elif option == '3':
-                previous_track(sp)
-            elif option == '4':
-                search_track(sp)
-            elif option == '5':
-                list_playlists(sp)
-            elif option == '6':
-                show_current_track(sp)
-            elif option == '7':
-                adjust_volume(sp)
-            elif option == '0':
+            if option == '0':
                 console.print("[bold green]Exiting Spotify CLI Player. Goodbye![/bold green]")
                 break
+            
+            action = ACTIONS.get(option)
+            if action:
+                action(sp)
             else:
                 console.print("[bold red]Invalid option. Please try again.[/bold red]")
-                time.sleep(1)
+                pause(1)
     
     except KeyboardInterrupt:
         console.print("\n[bold green]Program interrupted. Goodbye![/bold green]")
     except Exception as e:
         console.print(f"[bold red]Unexpected error: {e}[/bold red]")
+    finally:
+        if poller is not None:
+            poller.stop()
+        if http_session is not None:
+            http_session.close()
 
 if __name__ == "__main__":
     main()